@@ -1,22 +1,69 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 import argparse
+import hashlib
+import json
 import sys
-from justhtml import JustHTML
 import re
-import json
 import os
 import mimetypes
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 from rich.console import Console
-from rich.progress import (
-    Progress,
-    SpinnerColumn,
-    TextColumn,
-    BarColumn,
-    TaskProgressColumn,
-    TimeRemainingColumn,
-)
 from rich.theme import Theme
 
+# orjson parses the large embedded album payloads faster; it is optional
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# Size of each read/write when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Files larger than this are fetched as parallel byte ranges when the server
+# supports it, each range being at most RANGE_PART_SIZE bytes.
+RANGE_THRESHOLD = 8 * 1024 * 1024
+RANGE_PART_SIZE = 8 * 1024 * 1024
+RANGE_WORKERS = 4
+
+# mkstemp creates temp files as 0600; finished downloads get the mode a plain
+# open() would have given them. os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+# A .part temp file untouched for this many seconds belongs to a download
+# that was killed rather than one still running, and is deleted
+STALE_PART_AGE = 60 * 60
+
+# Resolved short URLs and album pages are cached here between runs
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "gphoto-get"
+)
+CACHE_INDEX = os.path.join(CACHE_DIR, "index.json")
+# Seconds a cached short-URL resolution is trusted before resolving again
+RESOLVE_CACHE_EXPIRE_AFTER = 24 * 60 * 60
+
+# Extensions for media types mimetypes may not know on every platform
+_EXT_FALLBACK = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "video/mp4": ".mp4",
+    "video/quicktime": ".mov",
+}
+_MEDIA_EXTENSIONS = frozenset(_EXT_FALLBACK.values())
+
+# Album data is embedded as AF_initDataCallback({...}) JS object literals.
+# Both patterns work on bytes so the payload is never re-decoded per match.
+_AF_RE = re.compile(rb"AF_initDataCallback\((.*?)\);?", re.DOTALL)
+# Unquoted object keys that need quoting before the literal parses as JSON
+_KEY_RE = re.compile(rb"([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:")
+
 # Setup Rich Console
 custom_theme = Theme(
     {
@@ -30,106 +77,420 @@ custom_theme = Theme(
 console = Console(theme=custom_theme)
 
 
-def log(message, verbose=False, style="info"):
-    """Prints a message only if verbose is True, or uses console.print if not verbose controlled."""
+def log(message, verbose=False, style="info", values=()):
+    """
+    Prints a message only if verbose is True, or uses console.print if not
+    verbose controlled. The values tuple is substituted into message with
+    str.format, which only happens when the message is actually printed.
+    """
     if verbose:
-        console.print(message, style=style)
+        console.print(message.format(*values) if values else message, style=style)
 
 
-def resolve_url(url, verbose=False):
+def load_cache():
+    """
+    Loads the HTTP cache index. A missing or unreadable index yields an empty
+    cache, so a broken cache only costs a normal uncached run.
+    """
+    cache = {}
+    try:
+        with open(CACHE_INDEX, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if not isinstance(cache, dict):
+        cache = {}
+    cache.setdefault("resolved", {})
+    cache.setdefault("pages", {})
+    # Page bodies fetched this run; written out by save_cache, never indexed
+    cache["bodies"] = {}
+    return cache
+
+
+def save_cache(cache, verbose=False):
+    """
+    Writes the HTTP cache index atomically along with the page bodies fetched
+    this run, then deletes stored bodies the index no longer refers to.
+    Failures are only logged.
+    """
+    bodies = cache.pop("bodies", {})
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for url, body in bodies.items():
+            with open(cache_body_path(url), "wb") as f:
+                f.write(body)
+        tmp_path = CACHE_INDEX + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, CACHE_INDEX)
+
+        referenced = {cache_body_path(url) for url in cache["pages"]}
+        with os.scandir(CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(".html") and entry.path not in referenced:
+                    os.remove(entry.path)
+    except OSError as e:
+        log("Could not write cache: {}", verbose, values=(e,), style="warning")
+
+
+def cache_body_path(url):
+    """Returns the path where the cached body of url is stored."""
+    return os.path.join(CACHE_DIR, hashlib.sha256(url.encode()).hexdigest() + ".html")
+
+
+def resolve_url(session, url, verbose=False, cache=None):
     """
     Resolves the short URL (e.g., photos.app.goo.gl) to the full URL.
+    Successful resolutions are kept in cache for RESOLVE_CACHE_EXPIRE_AFTER.
     """
-    log(f"Resolving: {url}...", verbose)
+    cached = cache["resolved"].get(url) if cache is not None else None
+    if (
+        isinstance(cached, dict)
+        and time.time() - cached.get("time", 0) < RESOLVE_CACHE_EXPIRE_AFTER
+    ):
+        final_url = cached["url"]
+        log("Resolved {} to {} (cached)", verbose, values=(url, final_url))
+        return final_url
+
+    log("Resolving: {}...", verbose, values=(url,))
     try:
-        response = requests.head(url, allow_redirects=True)
-        if response.status_code != 200:
-            response = requests.get(url, allow_redirects=True, stream=True)
+        response = session.head(url, allow_redirects=True)
+        # A different final URL means the redirects were followed, whatever
+        # the last hop answered to HEAD. Only retry with GET when HEAD went
+        # nowhere and was rejected.
+        if response.url == url and response.status_code >= 400:
+            response = session.get(url, allow_redirects=True, stream=True)
             response.close()
 
         final_url = response.url
-        log(f"Resolved to: {final_url}", verbose)
+        log("Resolved to: {}", verbose, values=(final_url,))
+        # Redirects that were followed are worth keeping even when the last
+        # hop rejects HEAD, but not ones that ended on a missing page
+        if (
+            cache is not None
+            and final_url != url
+            and response.status_code not in (404, 410)
+        ):
+            cache["resolved"][url] = {"url": final_url, "time": time.time()}
         return final_url
     except Exception as e:
         console.print(f"Error resolving URL: {e}", style="danger")
         return None
 
 
-def fetch_page_content(url, verbose=False):
+def fetch_page_content(session, url, verbose=False, cache=None):
     """
-    Fetches the HTML content of a given URL.
+    Fetches the HTML content of a given URL as bytes, ready for parsing.
+    With a cache, the request is revalidated with the stored ETag or
+    Last-Modified and a 304 response is answered from the cached body.
     """
-    log(f"Fetching page content from: {url}...", verbose)
+    log("Fetching page content from: {}...", verbose, values=(url,))
     try:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        response = requests.get(url, headers=headers)
+        cached = cache["pages"].get(url) if cache is not None else None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = session.get(url, headers=headers)
         response.raise_for_status()
+
+        # Only trust a 304 for a request that was actually conditional
+        if cached and response.status_code == 304:
+            try:
+                with open(cache_body_path(url), "rb") as f:
+                    content = f.read()
+                log("Page not modified, using cached content", verbose)
+                return content
+            except OSError:
+                # Cached body went missing, fetch it again unconditionally
+                del cache["pages"][url]
+                return fetch_page_content(session, url, verbose, cache)
+
         log(
-            f"Successfully fetched page content ({len(response.text)} bytes)",
+            "Successfully fetched page content ({} bytes)",
             verbose,
+            values=(len(response.content),),
             style="success",
         )
-        return response.text
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        no_store = "no-store" in response.headers.get("Cache-Control", "").lower()
+        if cache is not None:
+            if (etag or last_modified) and not no_store:
+                # Kept in memory until save_cache, which only runs once the
+                # page turned out to be an album worth revalidating
+                cache["pages"][url] = {"etag": etag, "last_modified": last_modified}
+                cache["bodies"][url] = response.content
+            else:
+                cache["pages"].pop(url, None)
+
+        return response.content
     except requests.exceptions.RequestException as e:
         console.print(f"Error fetching page content from {url}: {e}", style="danger")
         return None
 
 
-def check_file_exists(output_dir, base_name):
-    """Checks if a file with the base_name exists in output_dir (ignoring extension)."""
-    if not os.path.exists(output_dir):
-        return None
+def index_existing_files(output_dir):
+    """
+    Maps each file name stem in output_dir to its directory entries, built
+    from a single directory scan so sync checks are O(1) per photo.
+    Entry types are not checked here; callers only check is_file() on the
+    few entries whose stem matches a photo.
+    """
+    index = {}
+    if not os.path.isdir(output_dir):
+        return index
 
-    for existing_file in os.listdir(output_dir):
-        # We look for files starting with base_name
-        if existing_file.startswith(base_name) and os.path.isfile(
-            os.path.join(output_dir, existing_file)
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            # Leftovers of interrupted downloads do not count as present
+            if entry.name.endswith(".part"):
+                continue
+            index.setdefault(os.path.splitext(entry.name)[0], []).append(entry)
+    return index
+
+
+def remove_stale_parts(output_dir, verbose=False):
+    """
+    Deletes .part temp files left in output_dir by downloads that were
+    killed before they could clean up. Recently written ones are kept in
+    case another run is still downloading into the same directory.
+    """
+    cutoff = time.time() - STALE_PART_AGE
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".part"):
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    log("Removed stale {}", verbose, values=(entry.name,))
+            except OSError as e:
+                log(
+                    "Could not remove {}: {}",
+                    verbose,
+                    values=(entry.name, e),
+                    style="warning",
+                )
+
+
+def create_session(pool_size):
+    """
+    Creates the requests Session shared by every HTTP call in a run. Its
+    connection pool can serve pool_size concurrent workers, so keep-alive
+    connections are reused, and transient server errors are retried.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def preallocate(fd, size):
+    """
+    Sizes the file open on fd to size bytes before ranged parts are written
+    into it. On Linux the space is also reserved with fallocate so the
+    filesystem can lay it out contiguously; elsewhere posix_fallocate may be
+    emulated by writing every block, which costs more than it saves, so the
+    file is only extended with ftruncate.
+    """
+    if sys.platform.startswith("linux") and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
+def write_stream(fd, chunks, digest=None):
+    """
+    Writes every chunk to the file open on fd with os.write, bypassing the
+    buffered file object layer. Returns the number of bytes written.
+    If digest is given, it is updated with the data as it is written.
+    """
+    written = 0
+    for chunk in chunks:
+        if digest is not None:
+            digest.update(chunk)
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(fd, view) :]
+        written += len(chunk)
+    return written
+
+
+def stream_to_file(response, fd, digest=None):
+    """
+    Writes the body of a streamed response to the empty file open on fd and
+    returns the number of bytes written.
+    """
+    # Read straight from urllib3 in large blocks, letting it undo any
+    # Content-Encoding, with one os.write per block.
+    chunks = response.raw.stream(DOWNLOAD_CHUNK_SIZE, decode_content=True)
+    return write_stream(fd, chunks, digest)
+
+
+class RangeNotSupportedError(Exception):
+    """Raised when a server does not honour a byte-range request."""
+
+
+def download_range(session, url, fd, start, end):
+    """
+    Fetches bytes start..end (inclusive) of url and writes them at the same
+    offset in the already-sized file open on fd.
+    """
+    headers = {"Range": f"bytes={start}-{end}"}
+    with session.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        # Servers may advertise Accept-Ranges and still send the whole body
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code != 206 or not content_range.startswith(
+            f"bytes {start}-{end}/"
         ):
-            # Strict check: ensure the stem matches exactly
-            name_part, _ = os.path.splitext(existing_file)
-            if name_part == base_name:
-                return os.path.join(output_dir, existing_file)
-    return None
+            raise RangeNotSupportedError(
+                f"Range request returned {response.status_code} "
+                f"({content_range or 'no Content-Range'})"
+            )
+        offset = start
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
 
 
-def download_photo(url, output_dir, photo_id, verbose=False):
+def download_ranges(session, url, fd, total_size):
+    """
+    Downloads url into the file open on fd as concurrent byte-range requests,
+    writing each part in place into the file preallocated to total_size.
+    """
+    ranges = [
+        (start, min(start + RANGE_PART_SIZE, total_size) - 1)
+        for start in range(0, total_size, RANGE_PART_SIZE)
+    ]
+    preallocate(fd, total_size)
+    # Fetch the first part alone so a server that ignores Range fails fast,
+    # before any of the other parts are requested
+    download_range(session, url, fd, *ranges[0])
+    with ThreadPoolExecutor(max_workers=RANGE_WORKERS) as executor:
+        futures = [
+            executor.submit(download_range, session, url, fd, start, end)
+            for start, end in ranges[1:]
+        ]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except Exception:
+            # Don't start queued parts once one has failed
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def guess_ext_from_url(url):
+    """
+    Returns the media extension the URL path ends with, or None.
+    googleusercontent URLs rarely carry one, and their =w...-h... size
+    suffix says nothing about the format, so this is only a fallback for
+    responses without a usable Content-Type.
+    """
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    return extension if extension in _MEDIA_EXTENSIONS else None
+
+
+def download_photo(session, url, output_dir, photo_id, verbose=False):
     """
     Downloads a photo. Returns the filepath if successful, None if failed.
+    Safe to call from multiple threads sharing the same session.
     """
     base_name = photo_id
+    fd = None
+    tmp_path = None
+    # Only verbose runs report a checksum, so only they pay for hashing
+    digest = hashlib.sha256() if verbose else None
 
-    log(f"Processing {url}...", verbose)
+    log("Processing {}...", verbose, values=(url,))
     try:
-        response = requests.get(url, stream=True)
+        response = session.get(url, stream=True)
         response.raise_for_status()
 
-        content_type = response.headers.get("Content-Type")
+        # Drop parameters such as "; charset=..." before looking up the type
+        content_type = response.headers.get("Content-Type") or ""
+        content_type = content_type.split(";", 1)[0].strip().lower()
         extension = mimetypes.guess_extension(content_type)
-
-        if not extension:
-            if "image/jpeg" in content_type:
-                extension = ".jpg"
-            elif "image/png" in content_type:
-                extension = ".png"
-            elif "video/mp4" in content_type:
-                extension = ".mp4"
-            else:
-                extension = ".bin"
+        extension = extension or _EXT_FALLBACK.get(content_type)
+        if not extension or content_type == "application/octet-stream":
+            # No usable media type, so trust a suffix on the URL if present
+            extension = guess_ext_from_url(url) or extension or ".bin"
 
         filename = f"{base_name}{extension}"
         filepath = os.path.join(output_dir, filename)
+        # Write under a temporary name so an interrupted download never
+        # looks complete to a later --sync run. The name is unique per call,
+        # so concurrent downloads of photos sharing an ID never share a file.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=output_dir, prefix=f"{filename}.", suffix=".part"
+        )
 
-        log(f"Downloading to {filepath}...", verbose)
-        with open(filepath, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        log(f"Successfully downloaded {filename}", verbose, style="success")
+        log("Downloading to {}...", verbose, values=(filepath,))
+        total_size = int(response.headers.get("Content-Length") or 0)
+        use_ranges = (
+            total_size > RANGE_THRESHOLD
+            and response.headers.get("Accept-Ranges") == "bytes"
+            and "Content-Encoding" not in response.headers
+            and hasattr(os, "pwrite")
+        )
+        if use_ranges:
+            # Large videos: a single stream rarely saturates the link, so drop
+            # this response and fetch the file as parallel ranges instead.
+            response.close()
+            log("Downloading {} in parallel ranges...", verbose, values=(filename,))
+            try:
+                download_ranges(session, url, fd, total_size)
+                # Parts arrive out of order, so there is no running checksum
+                digest = None
+            except RangeNotSupportedError as e:
+                log("{}, downloading {} as one stream", verbose, values=(e, filename))
+                response = session.get(url, stream=True)
+                response.raise_for_status()
+                os.ftruncate(fd, 0)
+                use_ranges = False
+        if not use_ranges:
+            stream_to_file(response, fd, digest)
+        os.close(fd)
+        fd = None
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, filepath)
+        tmp_path = None
+        log("Successfully downloaded {}", verbose, values=(filename,), style="success")
+        if digest is not None:
+            log("SHA256 {}: {}", verbose, values=(filename, digest.hexdigest()))
         return filepath
-    except requests.exceptions.RequestException as e:
+    # Reading response.raw directly surfaces urllib3 errors unwrapped, and
+    # local I/O errors (e.g. a full disk) only fail this one photo
+    except (requests.exceptions.RequestException, Urllib3HTTPError, OSError) as e:
         console.print(f"Error downloading {url}: {e}", style="danger")
         return None
+    finally:
+        if fd is not None:
+            os.close(fd)
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 
 def main():
@@ -141,94 +502,115 @@ def main():
     parser.add_argument(
         "-s", "--sync", action="store_true", help="Sync mode (skip existing)"
     )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of parallel downloads (default: 8)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the cache of resolved URLs and album pages",
+    )
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
     args = parser.parse_args()
 
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    # Each download worker may open up to RANGE_WORKERS connections at once
+    session = create_session(args.concurrency * RANGE_WORKERS)
+    cache = None if args.no_cache else load_cache()
+
     # 1. Resolve URL
-    full_url = resolve_url(args.url, args.verbose)
+    full_url = resolve_url(session, args.url, args.verbose, cache)
     if not full_url:
         sys.exit(1)
 
     # 2. Fetch Content
     with console.status("[bold green]Fetching album metadata...") as status:
-        html_content = fetch_page_content(full_url, args.verbose)
+        html_content = fetch_page_content(session, full_url, args.verbose, cache)
         if not html_content:
             sys.exit(1)
 
-        doc = JustHTML(html_content)
-        script_tags = doc.query("script")
-
         photo_entries_found = []
 
         status.update("[bold green]Parsing photos...")
-        for script in script_tags:
-            script_content = script.to_text()
-            if script_content and "AF_initDataCallback" in script_content:
-                match = re.search(
-                    r"AF_initDataCallback\((.*?)\);?", script_content, re.DOTALL
-                )
-                if match:
-                    full_json_arg_str = match.group(1)
-                    cleaned_json_str = full_json_arg_str.replace("'", '"')
-                    cleaned_json_str = re.sub(
-                        r"([{,])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:",
-                        r'\1"\2":',
-                        cleaned_json_str,
-                    )
-
-                    try:
-                        parsed_callback_data = json.loads(cleaned_json_str)
-                        data_array = parsed_callback_data.get("data")
-
+        # Script bodies are raw text in HTML, so the callbacks appear verbatim
+        # in the page source; scan it once instead of building a DOM and
+        # extracting the text of every <script> tag.
+        # The page is scanned as the raw response bytes, which json and orjson
+        # both parse directly.
+        for match in _AF_RE.finditer(html_content):
+            full_json_arg_str = match.group(1)
+            cleaned_json_str = full_json_arg_str.replace(b"'", b'"')
+            cleaned_json_str = _KEY_RE.sub(rb'\1"\2":', cleaned_json_str)
+
+            try:
+                parsed_callback_data = _json.loads(cleaned_json_str)
+                data_array = parsed_callback_data.get("data")
+
+                if (
+                    data_array
+                    and isinstance(data_array, list)
+                    and len(data_array) > 1
+                    and isinstance(data_array[1], list)
+                ):
+                    photos_data = data_array[1]
+                    for photo_entry in photos_data:
                         if (
-                            data_array
-                            and isinstance(data_array, list)
-                            and len(data_array) > 1
-                            and isinstance(data_array[1], list)
+                            isinstance(photo_entry, list)
+                            and len(photo_entry) > 1
+                            and isinstance(photo_entry[1], list)
+                            and len(photo_entry[1]) > 0
+                            and isinstance(photo_entry[1][0], str)
+                            and "googleusercontent.com" in photo_entry[1][0]
                         ):
-                            photos_data = data_array[1]
-                            for photo_entry in photos_data:
-                                if (
-                                    isinstance(photo_entry, list)
-                                    and len(photo_entry) > 1
-                                    and isinstance(photo_entry[1], list)
-                                    and len(photo_entry[1]) > 0
-                                    and isinstance(photo_entry[1][0], str)
-                                    and "googleusercontent.com" in photo_entry[1][0]
-                                ):
-                                    raw_id = photo_entry[0]
-                                    photo_url = photo_entry[1][0]
-
-                                    clean_id = raw_id
-                                    if isinstance(clean_id, str) and len(clean_id) >= 6:
-                                        # Strip first 6 chars, then take the next 8 chars
-                                        clean_id = clean_id[6:14]
-
-                                    photo_entries_found.append((photo_url, clean_id))
-                    except json.JSONDecodeError:
-                        pass
+                            raw_id = photo_entry[0]
+                            photo_url = photo_entry[1][0]
+
+                            clean_id = raw_id
+                            if isinstance(clean_id, str) and len(clean_id) >= 6:
+                                # Strip first 6 chars, then take the next 8 chars
+                                clean_id = clean_id[6:14]
+
+                            photo_entries_found.append((photo_url, clean_id))
+            except (_json.JSONDecodeError, ValueError):
+                pass
 
     total_photos = len(photo_entries_found)
     if total_photos == 0:
         console.print("No photos found in album.", style="warning")
         sys.exit(0)
 
+    # Only remember the resolution and page once they yielded an album
+    if cache is not None:
+        save_cache(cache, args.verbose)
+
     # 3. Analyze Sync State
     to_download = []
     skipped_count = 0
 
     if not os.path.exists(args.output_dir):
         os.makedirs(args.output_dir)
+    remove_stale_parts(args.output_dir, args.verbose)
 
     console.print(f"Found [bold]{total_photos}[/bold] photos in album.")
 
     if args.sync:
         with console.status("[bold green]Checking existing files...") as status:
+            existing_files = index_existing_files(args.output_dir)
             for url, pid in photo_entries_found:
-                existing = check_file_exists(args.output_dir, pid)
-                if existing:
+                if any(entry.is_file() for entry in existing_files.get(pid, ())):
                     skipped_count += 1
-                    log(f"Skipping {pid} (exists)", args.verbose, style="info")
+                    log(
+                        "Skipping {} (exists)",
+                        args.verbose,
+                        values=(pid,),
+                        style="info",
+                    )
                 else:
                     to_download.append((url, pid))
     else:
@@ -243,6 +625,16 @@ def main():
         console.print("[bold green]All photos up to date![/bold green]")
         sys.exit(0)
 
+    # Imported here so runs with nothing to download skip loading it
+    from rich.progress import (
+        BarColumn,
+        Progress,
+        SpinnerColumn,
+        TaskProgressColumn,
+        TextColumn,
+        TimeRemainingColumn,
+    )
+
     success_count = 0
     fail_count = 0
 
@@ -257,13 +649,26 @@ def main():
     ) as progress:
         task = progress.add_task("[cyan]Downloading...", total=len(to_download))
 
-        for url, pid in to_download:
-            result = download_photo(url, args.output_dir, pid, args.verbose)
-            if result:
-                success_count += 1
-            else:
-                fail_count += 1
-            progress.advance(task)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [
+                executor.submit(
+                    download_photo, session, url, args.output_dir, pid, args.verbose
+                )
+                for url, pid in to_download
+            ]
+            try:
+                for future in as_completed(futures):
+                    if future.result():
+                        success_count += 1
+                    else:
+                        fail_count += 1
+                    progress.advance(task)
+            except KeyboardInterrupt:
+                # Leaving the executor waits for every queued download, so
+                # cancel those first; only the ones in flight still finish.
+                for future in futures:
+                    future.cancel()
+                raise
 
     # 5. Summary
     console.print("\n[bold]Summary:[/bold]")
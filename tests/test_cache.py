@@ -0,0 +1,201 @@
+import http.server
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import gphoto_get  # noqa: E402
+
+ETAG = '"album-v1"'
+PHOTO = os.urandom(4096)
+
+
+class AlbumHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves a one-photo album: /short redirects to /album, which carries an
+    ETag and answers a matching If-None-Match with 304. /album?nostore is the
+    same page marked Cache-Control: no-store.
+    """
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def serve(self, send_body):
+        if_none_match = self.headers.get("If-None-Match")
+        AlbumHandler.requests.append((self.command, self.path, if_none_match))
+        headers = {}
+        body = b""
+        if self.path == "/short":
+            status = 302
+            headers["Location"] = "/album"
+        elif self.path.startswith("/album"):
+            status = 200
+            headers["ETag"] = ETAG
+            if self.path.endswith("?nostore"):
+                headers["Cache-Control"] = "no-store"
+            if if_none_match == ETAG:
+                status = 304
+            else:
+                headers["Content-Type"] = "text/html"
+                body = album_page(self.server.server_address[1])
+        else:
+            status = 200
+            headers["Content-Type"] = "image/jpeg"
+            body = PHOTO
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def album_page(port):
+    """Returns album HTML whose single photo is served by the same server."""
+    photo_url = f"http://127.0.0.1:{port}/googleusercontent.com/photo"
+    return (
+        "<html><head><script nonce='x'>AF_initDataCallback({key: 'ds:1', "
+        f"data:[null,[['AF1QipPHOTO001rest',['{photo_url}',1,1]]]]}});"
+        "</script></head><body></body></html>"
+    ).encode()
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    """Points the on-disk cache at an empty temporary directory."""
+    path = str(tmp_path / "cache")
+    monkeypatch.setattr(gphoto_get, "CACHE_DIR", path)
+    monkeypatch.setattr(gphoto_get, "CACHE_INDEX", os.path.join(path, "index.json"))
+    return path
+
+
+@pytest.fixture
+def album_server():
+    """Runs AlbumHandler on a free local port."""
+    AlbumHandler.requests = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), AlbumHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("content", ["{not json", "[]"])
+def test_load_cache_corrupt_index(cache_dir, content):
+    """An unreadable or malformed index yields an empty cache."""
+    os.makedirs(cache_dir)
+    with open(gphoto_get.CACHE_INDEX, "w", encoding="utf-8") as f:
+        f.write(content)
+
+    cache = gphoto_get.load_cache()
+
+    assert cache == {"resolved": {}, "pages": {}, "bodies": {}}
+
+
+def test_resolve_url_expiry(cache_dir, album_server):
+    """Resolutions are reused until RESOLVE_CACHE_EXPIRE_AFTER has passed."""
+    session = gphoto_get.create_session(1)
+    cache = gphoto_get.load_cache()
+    short_url = album_server + "/short"
+
+    assert gphoto_get.resolve_url(session, short_url, cache=cache) == (
+        album_server + "/album"
+    )
+    hits = len(AlbumHandler.requests)
+    assert gphoto_get.resolve_url(session, short_url, cache=cache) == (
+        album_server + "/album"
+    )
+    assert len(AlbumHandler.requests) == hits
+
+    cache["resolved"][short_url]["time"] -= gphoto_get.RESOLVE_CACHE_EXPIRE_AFTER
+    gphoto_get.resolve_url(session, short_url, cache=cache)
+    assert len(AlbumHandler.requests) > hits
+
+
+def test_fetch_page_content_not_modified(cache_dir, album_server):
+    """A 304 is answered from the body stored by the previous run."""
+    session = gphoto_get.create_session(1)
+    url = album_server + "/album"
+    cache = gphoto_get.load_cache()
+    page = gphoto_get.fetch_page_content(session, url, cache=cache)
+    gphoto_get.save_cache(cache)
+
+    cache = gphoto_get.load_cache()
+    assert gphoto_get.fetch_page_content(session, url, cache=cache) == page
+    assert AlbumHandler.requests[-1] == ("GET", "/album", ETAG)
+
+
+def test_fetch_page_content_missing_body(cache_dir, album_server):
+    """A 304 without a stored body is refetched unconditionally."""
+    session = gphoto_get.create_session(1)
+    url = album_server + "/album"
+    cache = gphoto_get.load_cache()
+    page = gphoto_get.fetch_page_content(session, url, cache=cache)
+    gphoto_get.save_cache(cache)
+    os.remove(gphoto_get.cache_body_path(url))
+
+    cache = gphoto_get.load_cache()
+    assert gphoto_get.fetch_page_content(session, url, cache=cache) == page
+    assert AlbumHandler.requests[-2:] == [
+        ("GET", "/album", ETAG),
+        ("GET", "/album", None),
+    ]
+
+
+def test_save_cache_bodies(cache_dir, album_server):
+    """
+    Bodies are only written by save_cache, no-store pages are not kept, and
+    bodies the index no longer refers to are deleted.
+    """
+    session = gphoto_get.create_session(1)
+    url = album_server + "/album"
+    cache = gphoto_get.load_cache()
+    gphoto_get.fetch_page_content(session, url, cache=cache)
+    gphoto_get.fetch_page_content(session, url + "?nostore", cache=cache)
+    assert not os.path.exists(cache_dir)
+
+    os.makedirs(cache_dir)
+    orphan = os.path.join(cache_dir, "0" * 64 + ".html")
+    with open(orphan, "wb") as f:
+        f.write(b"stale")
+    gphoto_get.save_cache(cache)
+
+    assert sorted(os.listdir(cache_dir)) == sorted(
+        ["index.json", os.path.basename(gphoto_get.cache_body_path(url))]
+    )
+    with open(gphoto_get.CACHE_INDEX, encoding="utf-8") as f:
+        assert list(json.load(f)["pages"]) == [url]
+
+
+def test_main_no_cache(cache_dir, album_server, tmp_path, monkeypatch):
+    """--no-cache neither sends conditional requests nor writes the cache."""
+    output_dir = str(tmp_path / "out")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["gphoto-get", album_server + "/short", "-o", output_dir, "--no-cache"],
+    )
+
+    for _ in range(2):
+        gphoto_get.main()
+
+    assert not os.path.exists(cache_dir)
+    assert all(if_none_match is None for *_, if_none_match in AlbumHandler.requests)
+    with open(os.path.join(output_dir, "PHOTO001.jpg"), "rb") as f:
+        assert f.read() == PHOTO
@@ -0,0 +1,164 @@
+import http.server
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import gphoto_get  # noqa: E402
+
+VIDEO = os.urandom(300 * 1024 + 123)
+
+
+class VideoHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves VIDEO at any path. Every response advertises Accept-Ranges, but
+    paths ending in ?norange ignore the Range header and send the full body.
+    """
+
+    protocol_version = "HTTP/1.1"
+    range_requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = VIDEO
+        status = 200
+        range_header = self.headers.get("Range")
+        honour_range = not self.path.endswith("?norange")
+        if range_header:
+            VideoHandler.range_requests.append(range_header)
+        if range_header and honour_range:
+            start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", range_header).groups())
+            body = VIDEO[start : end + 1]
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(VIDEO)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def video_server(monkeypatch):
+    """Runs VideoHandler on a free local port with small range thresholds."""
+    monkeypatch.setattr(gphoto_get, "RANGE_THRESHOLD", 64 * 1024)
+    monkeypatch.setattr(gphoto_get, "RANGE_PART_SIZE", 64 * 1024)
+    VideoHandler.range_requests = []
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), VideoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("path", ["/video", "/video?norange"])
+def test_download_photo_ranged(video_server, tmp_path, path):
+    """
+    Large downloads are fetched as byte ranges, and fall back to a single
+    stream when the server answers a Range request with the full body.
+    """
+    session = gphoto_get.create_session(gphoto_get.RANGE_WORKERS)
+
+    result = gphoto_get.download_photo(
+        session, video_server + path, str(tmp_path), "vid"
+    )
+
+    assert result == os.path.join(str(tmp_path), "vid.mp4")
+    with open(result, "rb") as f:
+        assert f.read() == VIDEO
+    assert os.listdir(str(tmp_path)) == ["vid.mp4"]
+    assert VideoHandler.range_requests, "Ranged download was not attempted"
+
+
+def test_download_photo_norange_probes_once(video_server, tmp_path):
+    """A server that ignores Range gets one range request, not one per part."""
+    session = gphoto_get.create_session(gphoto_get.RANGE_WORKERS)
+
+    result = gphoto_get.download_photo(
+        session, video_server + "/video?norange", str(tmp_path), "vid"
+    )
+
+    assert result == os.path.join(str(tmp_path), "vid.mp4")
+    assert len(VideoHandler.range_requests) == 1
+
+
+def test_download_photo_respects_umask(video_server, tmp_path, monkeypatch):
+    """Downloads get the process umask applied rather than a fixed mode."""
+    monkeypatch.setattr(gphoto_get, "_UMASK", 0o077)
+    session = gphoto_get.create_session(gphoto_get.RANGE_WORKERS)
+
+    result = gphoto_get.download_photo(
+        session, video_server + "/video", str(tmp_path), "vid"
+    )
+
+    assert os.stat(result).st_mode & 0o777 == 0o600
+
+
+def test_download_photo_same_id_concurrently(video_server, tmp_path):
+    """Concurrent downloads of photos sharing an ID never share a temp file."""
+    session = gphoto_get.create_session(2 * gphoto_get.RANGE_WORKERS)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(
+                gphoto_get.download_photo,
+                session,
+                video_server + "/video",
+                str(tmp_path),
+                "vid",
+            )
+            for _ in range(2)
+        ]
+        results = [future.result() for future in futures]
+
+    assert results == [os.path.join(str(tmp_path), "vid.mp4")] * 2
+    assert os.listdir(str(tmp_path)) == ["vid.mp4"]
+
+
+def test_download_photo_os_error(video_server, tmp_path):
+    """Local I/O errors fail the photo instead of escaping download_photo."""
+    session = gphoto_get.create_session(gphoto_get.RANGE_WORKERS)
+    missing_dir = os.path.join(str(tmp_path), "missing")
+
+    result = gphoto_get.download_photo(
+        session, video_server + "/video", missing_dir, "vid"
+    )
+
+    assert result is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_index_existing_files_skips_parts(tmp_path):
+    """Temp files of unfinished downloads do not make a photo count as present."""
+    for name in ("done.jpg", "partial.jpg.x1y2z3.part"):
+        (tmp_path / name).write_bytes(b"x")
+
+    index = gphoto_get.index_existing_files(str(tmp_path))
+
+    assert sorted(index) == ["done"]
+    assert [entry.name for entry in index["done"]] == ["done.jpg"]
+
+
+def test_remove_stale_parts(tmp_path):
+    """Old .part files are deleted; recent ones and finished files are kept."""
+    for name in ("done.jpg", "stale.jpg.a.part", "fresh.jpg.b.part"):
+        (tmp_path / name).write_bytes(b"x")
+    old = time.time() - gphoto_get.STALE_PART_AGE - 60
+    os.utime(str(tmp_path / "stale.jpg.a.part"), (old, old))
+
+    gphoto_get.remove_stale_parts(str(tmp_path))
+
+    assert sorted(os.listdir(str(tmp_path))) == ["done.jpg", "fresh.jpg.b.part"]
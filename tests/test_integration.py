@@ -10,10 +10,14 @@ BINARY_PATH = os.path.join(os.path.dirname(__file__), "..", "dist", "gphoto-get"
 
 def calculate_sha256(filepath):
     """Calculates the SHA256 hash of a file."""
-    sha256_hash = hashlib.sha256()
     with open(filepath, "rb") as f:
-        # Read and update hash string value in blocks of 4K
-        for byte_block in iter(lambda: f.read(4096), b""):
+        # file_digest (Python 3.11+) streams the file through OpenSSL in C
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        sha256_hash = hashlib.sha256()
+        # Read and update hash string value in blocks of 1M
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
             sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 